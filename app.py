@@ -3,30 +3,26 @@ AI-Powered Code Review System - Streamlit Web Application
 Interactive web interface for automated code analysis using CrewAI + Gemini
 """
 
+import asyncio
+import contextlib
+import hashlib
+import json
 import streamlit as st
 import os
-from crewai import Agent, Task, Crew, Process
-from crewai_tools import FileReadTool
-from crewai.llm import LLM
 from dotenv import load_dotenv
+from report import synthesize_report
 import tempfile
+import threading
 import time
+import types
+import uuid
+from collections import OrderedDict
 from datetime import datetime
-import os
-
+from pathlib import Path
 
 
-# Page configuration
-st.set_page_config(
-    page_title="AI Code Review System",
-    page_icon="🔍",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Custom CSS
-st.markdown(
-    """
+# Static markup, built once per process rather than on every rerun
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -59,9 +55,441 @@ st.markdown(
         color: white;
     }
 </style>
-""",
-    unsafe_allow_html=True,
+"""
+
+AGENT_CARDS_HTML = """
+<div class="agent-card">
+    <strong>1. Code Quality Analyst</strong><br>
+    Analyzes bugs & best practices
+</div>
+<div class="agent-card">
+    <strong>2. Security Auditor</strong><br>
+    Finds vulnerabilities
+</div>
+<div class="agent-card">
+    <strong>3. Performance Expert</strong><br>
+    Optimizes efficiency
+</div>
+<div class="agent-card">
+    <strong>4. Documentation Writer</strong><br>
+    Reviews documentation
+</div>
+<div class="agent-card">
+    <strong>5. Review Synthesizer</strong><br>
+    Creates final report
+</div>
+"""
+# Status labels for each pipeline stage, in display order
+STAGE_LABELS = {
+    "analysis": "🔍 Agent 1/5: Analyzing code quality...",
+    "security": "🔒 Agent 2/5: Auditing security...",
+    "performance": "⚡ Agent 3/5: Analyzing performance...",
+    "documentation": "📝 Agent 4/5: Reviewing documentation...",
+    "synthesis": "📊 Agent 5/5: Synthesizing results...",
+}
+
+# Persona of the agent behind each pipeline stage
+AGENT_SPECS = {
+    "analysis": {
+        "role": "Senior Code Quality Analyst",
+        "goal": "Analyze code for bugs, code smells, and potential issues",
+        "backstory": (
+            "You are a veteran software engineer with 20 years "
+            "of experience in code reviews. You have a keen eye "
+            "for spotting bugs, performance issues, and "
+            "violations of best practices."
+        ),
+    },
+    "security": {
+        "role": "Cybersecurity Expert",
+        "goal": "Identify security vulnerabilities and risks in code",
+        "backstory": (
+            "You are a certified security researcher specializing "
+            "in OWASP Top 10 vulnerabilities. You've prevented "
+            "countless security breaches."
+        ),
+    },
+    "performance": {
+        "role": "Performance Optimization Specialist",
+        "goal": "Analyze code performance and suggest optimizations",
+        "backstory": (
+            "You are a performance engineer who has optimized "
+            "applications serving millions of users."
+        ),
+    },
+    "documentation": {
+        "role": "Technical Documentation Expert",
+        "goal": "Review and improve code documentation",
+        "backstory": (
+            "You are a technical writer who believes great code "
+            "tells a story."
+        ),
+    },
+    "synthesis": {
+        "role": "Lead Code Reviewer",
+        "goal": (
+            "Synthesize all reviews and create actionable "
+            "recommendations"
+        ),
+        "backstory": (
+            "You are a tech lead who has mentored dozens of "
+            "developers."
+        ),
+    },
+}
+
+# Shared head of every review prompt: the code, line-number and finding
+# format instructions are written once instead of in each task
+TASK_PREAMBLE = """
+```
+{code}
+```
+
+Review the code above. Give specific line numbers for every issue and start
+each finding with a heading of the form
+### [Severity] Short title
+where Severity is one of Critical, High, Medium or Low. If there is nothing
+to report, answer with the single line
+No issues found.
+"""
+
+ANALYSIS_CONTEXT = """
+Code quality analysis from the previous agent:
+{analysis}
+"""
+
+# Example snippets offered in the Code Input tab
+SECURITY_EXAMPLE = """
+def get_user_data(user_id):
+    # SQL Injection vulnerability
+    query = "SELECT * FROM users WHERE id = " + str(user_id)
+    return db.execute(query)
+
+def login(username, password):
+    # Hardcoded credentials
+    if username == "admin" and password == "admin123":
+        return True
+    return False
+
+API_KEY = "sk-1234567890abcdef"  # Exposed secret
+"""
+
+PERFORMANCE_EXAMPLE = """
+def calculate_total(items):
+    # O(n*m) nested loop
+    total = 0
+    for item in items:
+        for price in item['prices']:
+            total = total + price
+    return total
+
+def process_data(data):
+    # Inefficient iteration
+    result = []
+    for i in range(len(data)):
+        if data[i] > 0:
+            result.append(data[i] * 2)
+    return result
+
+def find_duplicates(arr):
+    # O(n²) algorithm
+    duplicates = []
+    for i in range(len(arr)):
+        for j in range(i+1, len(arr)):
+            if arr[i] == arr[j]:
+                duplicates.append(arr[i])
+    return duplicates
+"""
+
+DOCUMENTATION_EXAMPLE = """
+def calc(a, b, c):
+    x = a + b
+    y = x * c
+    z = y / 2
+    return z
+
+def process(data):
+    result = []
+    for item in data:
+        if item > 0:
+            result.append(item)
+    return result
+
+class DataProcessor:
+    def __init__(self, data):
+        self.data = data
+
+    def process(self):
+        return [x * 2 for x in self.data]
+"""
+
+EXAMPLES = {
+    "Security Issues": (SECURITY_EXAMPLE, "example_security_issues.py"),
+    "Performance Problems": (
+        PERFORMANCE_EXAMPLE,
+        "example_performance_problems.py",
+    ),
+    "Documentation Issues": (
+        DOCUMENTATION_EXAMPLE,
+        "example_documentation_issues.py",
+    ),
+}
+
+# Full reports live on disk; session state only keeps their metadata
+REVIEW_DIR = Path(tempfile.gettempdir()) / "code_review_history"
+MAX_HISTORY = 20
+REVIEW_RETENTION = 3600
+
+
+def sweep_reviews():
+    """Delete stored reviews older than REVIEW_RETENTION from any session."""
+    cutoff = time.time() - REVIEW_RETENTION
+    for path in REVIEW_DIR.glob("*.json"):
+        with contextlib.suppress(FileNotFoundError):
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+
+
+def save_review(content, code):
+    """Write a review's report and source to disk and return its id.
+
+    The payload goes to a private temp file that is renamed into place, so a
+    failed write never leaves a truncated review or a stray file behind.
+    """
+    review_id = uuid.uuid4().hex
+    REVIEW_DIR.mkdir(parents=True, exist_ok=True)
+    sweep_reviews()
+    payload = json.dumps({"content": content, "code": code}).encode("utf-8")
+    fd, tmp_path = tempfile.mkstemp(dir=REVIEW_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(payload)
+        os.replace(tmp_path, REVIEW_DIR / f"{review_id}.json")
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+    return review_id
+
+
+@st.cache_resource(
+    show_spinner=False, max_entries=MAX_HISTORY, ttl=REVIEW_RETENTION
 )
+def read_review(review_id):
+    """Read a stored review back, with its report and source pre-encoded.
+
+    Returns ``{"content", "code", "content_bytes", "code_bytes"}``; the bytes
+    feed the download buttons so they aren't re-encoded on every rerun. The
+    dict is shared between reruns and must not be mutated.
+    """
+    path = REVIEW_DIR / f"{review_id}.json"
+    review = json.loads(path.read_text(encoding="utf-8"))
+    review["content_bytes"] = review["content"].encode("utf-8")
+    review["code_bytes"] = review["code"].encode("utf-8")
+    return review
+
+
+def load_review(review_id):
+    """Return a stored review if it is still on disk and within retention.
+
+    The cached copy from read_review is only served while its file exists,
+    so evicted or expired reviews can't be reopened from memory.
+    """
+    path = REVIEW_DIR / f"{review_id}.json"
+    if time.time() - path.stat().st_mtime > REVIEW_RETENTION:
+        delete_review(review_id)
+        raise FileNotFoundError(path)
+    return read_review(review_id)
+
+
+def delete_review(review_id):
+    """Remove a stored review, ignoring ones that are already gone."""
+    (REVIEW_DIR / f"{review_id}.json").unlink(missing_ok=True)
+
+
+# Finished reports shared across sessions, keyed by code hash and settings
+REVIEW_CACHE_SIZE = 128
+REVIEW_CACHE_TTL = 3600
+
+
+@st.cache_resource(show_spinner=False)
+def get_review_cache():
+    """Process-wide LRU of ``key -> (stored_at, report)`` and its lock."""
+    return OrderedDict(), threading.Lock()
+
+
+def review_cache_key(code, model, temperature, api_key):
+    """Key a review by code hash, model settings and an API key fingerprint."""
+    code_hash = hashlib.blake2b(code.encode("utf-8"), digest_size=16)
+    key_fingerprint = hashlib.blake2b(api_key.encode("utf-8"), digest_size=8)
+    return (
+        code_hash.hexdigest(),
+        model,
+        temperature,
+        key_fingerprint.hexdigest(),
+    )
+
+
+def get_cached_review(key):
+    """Return a cached report for ``key``, or None if missing or expired."""
+    cache, lock = get_review_cache()
+    with lock:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        stored_at, report = entry
+        if time.monotonic() - stored_at > REVIEW_CACHE_TTL:
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return report
+
+
+def put_cached_review(key, report):
+    """Store a finished report, evicting the least recently used entries."""
+    cache, lock = get_review_cache()
+    with lock:
+        cache[key] = (time.monotonic(), report)
+        cache.move_to_end(key)
+        while len(cache) > REVIEW_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def task_messages(task, **inputs):
+    """Render a task and its agent's persona as chat messages for one LLM call."""
+    agent = task.agent
+    return [
+        {
+            "role": "system",
+            "content": (
+                f"You are {agent.role}. {agent.backstory}\n"
+                f"Your goal: {agent.goal}"
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                f"{task.description.format(**inputs)}\n"
+                f"Expected output: {task.expected_output}"
+            ),
+        },
+    ]
+
+
+async def run_parallel_reviews(llm, tasks, inputs, on_done=None):
+    """Send independent review tasks to the LLM concurrently and collect outputs.
+
+    ``tasks`` maps a stage name to its task; the outputs come back under the
+    same names. Each task is a single prompt over the shared client, so the
+    requests reuse one connection pool instead of going through a crew each.
+    ``on_done(stage, output, done, total)`` runs on the calling thread as each
+    task finishes, so it is safe to update Streamlit elements from it.
+    """
+    done = 0
+
+    async def run(stage, task):
+        nonlocal done
+        result = str(
+            await asyncio.to_thread(llm.call, task_messages(task, **inputs))
+        )
+        done += 1
+        if on_done:
+            on_done(stage, result, done, len(tasks))
+        return result
+
+    results = await asyncio.gather(
+        *(run(stage, task) for stage, task in tasks.items())
+    )
+    return dict(zip(tasks, results))
+
+
+async def run_review(
+    analysis_crew, review_tasks, synthesis_crew, llm, code, on_start, on_output
+):
+    """Run the full review pipeline without blocking on any single stage.
+
+    ``on_start(stage, percent)`` is called as a stage begins and
+    ``on_output(stage, text, percent)`` as soon as its output is ready, so
+    results can be shown while later stages are still running. Each call is
+    also a point where Streamlit can interrupt the run (e.g. on cancel). LLM
+    calls run in worker threads and can't be aborted mid-flight: an
+    interrupted run still waits for the calls already started to return.
+    """
+    on_start("analysis", 40)
+    analysis = str(await analysis_crew.kickoff_async(inputs={"code": code}))
+    on_output("analysis", analysis, 55)
+
+    for stage in review_tasks:
+        on_start(stage, 55)
+    reviews = await run_parallel_reviews(
+        llm,
+        review_tasks,
+        {"code": code, "analysis": analysis},
+        on_done=lambda stage, output, done, total: on_output(
+            stage, output, 55 + 30 * done // total
+        ),
+    )
+
+    on_start("synthesis", 90)
+    reviews = {"analysis": analysis, **reviews}
+    result = synthesize_report(reviews)
+    if result is None:
+        # Findings didn't follow the heading format; let the agent merge them
+        result = str(await synthesis_crew.kickoff_async(inputs=reviews))
+    on_output("synthesis", result, 100)
+    return result
+
+
+@st.cache_resource(show_spinner=False)
+def crewai_modules():
+    """Import CrewAI on first use; it pulls in a heavy dependency tree."""
+    from crewai import Agent, Task, Crew, Process
+    from crewai.llm import LLM
+
+    return types.SimpleNamespace(
+        Agent=Agent, Task=Task, Crew=Crew, Process=Process, LLM=LLM
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_llm(model, temperature, api_key):
+    """Build the Gemini client once per model/temperature/key."""
+    return crewai_modules().LLM(
+        model=model,
+        verbose=False,
+        temperature=temperature,
+        google_api_key=api_key,
+    )
+
+
+def build_agents(model, temperature, api_key):
+    """Build fresh review agents for one review on the shared LLM client.
+
+    Agents carry per-run state (their crew and executor), so unlike the LLM
+    they are not cached and shared between sessions.
+    """
+    llm = get_llm(model, temperature, api_key)
+    Agent = crewai_modules().Agent
+    return {
+        stage: Agent(
+            **spec,
+            verbose=False,
+            allow_delegation=False,
+            llm=llm,
+        )
+        for stage, spec in AGENT_SPECS.items()
+    }
+
+
+# Page configuration
+st.set_page_config(
+    page_title="AI Code Review System",
+    page_icon="🔍",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Custom CSS
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # Load environment variables
 load_dotenv()
@@ -71,8 +499,8 @@ if "api_key" not in st.session_state:
     # langchain-google-genai uses GOOGLE_API_KEY by default
     st.session_state.api_key = os.getenv("GOOGLE_API_KEY", "")
 
-if "review_result" not in st.session_state:
-    st.session_state.review_result = None
+if "review_count" not in st.session_state:
+    st.session_state.review_count = 0
 
 if "review_history" not in st.session_state:
     st.session_state.review_history = []
@@ -87,8 +515,10 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# Sidebar
-with st.sidebar:
+# Sidebar; a fragment so its widgets rerun only the sidebar. Model settings
+# are read back from session state by the review handler.
+@st.fragment
+def render_sidebar():
     st.header("⚙️ Configuration")
 
     # API Key input
@@ -103,8 +533,10 @@ with st.sidebar:
     )
 
     if api_key_input:
-        st.session_state.api_key = api_key_input
-        os.environ["GOOGLE_API_KEY"] = st.session_state.api_key
+        if api_key_input != st.session_state.api_key:
+            st.session_state.api_key = api_key_input
+            # The review button and system status depend on the key
+            st.rerun()
         st.success("✅ API Key configured")
     else:
         st.warning("⚠️ Please enter your Gemini API key")
@@ -113,53 +545,31 @@ with st.sidebar:
 
     # Model selection (updated to 2.5 family)
     st.subheader("🤖 AI Model")
-    model_option = st.selectbox(
+    st.selectbox(
         "Select Model",
         [
             "gemini-2.5-flash-lite",  # fast & cheap, great default
             "gemini-2.5-pro",         # deeper reasoning, slower
         ],
         help="Flash-Lite is faster and cheaper, Pro is more accurate",
+        key="model_option",
     )
 
-    temperature = st.slider(
+    st.slider(
         "Temperature",
         min_value=0.0,
         max_value=1.0,
         value=0.3,
         step=0.1,
         help="Lower = more consistent, Higher = more creative",
+        key="temperature",
     )
 
     st.divider()
 
     # Agent status
     st.subheader("🤖 AI Agents")
-    st.markdown(
-        """
-    <div class="agent-card">
-        <strong>1. Code Quality Analyst</strong><br>
-        Analyzes bugs & best practices
-    </div>
-    <div class="agent-card">
-        <strong>2. Security Auditor</strong><br>
-        Finds vulnerabilities
-    </div>
-    <div class="agent-card">
-        <strong>3. Performance Expert</strong><br>
-        Optimizes efficiency
-    </div>
-    <div class="agent-card">
-        <strong>4. Documentation Writer</strong><br>
-        Reviews documentation
-    </div>
-    <div class="agent-card">
-        <strong>5. Review Synthesizer</strong><br>
-        Creates final report
-    </div>
-    """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(AGENT_CARDS_HTML, unsafe_allow_html=True)
 
     st.divider()
 
@@ -167,7 +577,7 @@ with st.sidebar:
     st.subheader("📊 Session Stats")
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Reviews Done", len(st.session_state.review_history))
+        st.metric("Reviews Done", st.session_state.review_count)
     with col2:
         st.metric("Active Agents", "5")
 
@@ -187,7 +597,9 @@ with st.sidebar:
 """,
     unsafe_allow_html=True,)
 
-    
+
+with st.sidebar:
+    render_sidebar()
 
 # Main content
 tab1, tab2, tab3, tab4 = st.tabs(
@@ -229,7 +641,13 @@ with tab1:
         )
 
         if uploaded_file:
-            code_content = uploaded_file.read().decode("utf-8")
+            # Decode once per upload, not on every widget interaction
+            if st.session_state.get("upload_id") != uploaded_file.file_id:
+                st.session_state.upload_id = uploaded_file.file_id
+                st.session_state.upload_content = (
+                    uploaded_file.getvalue().decode("utf-8")
+                )
+            code_content = st.session_state.upload_content
             file_name = uploaded_file.name
             st.success(
                 f"✅ Loaded: {file_name} ({len(code_content)} characters)"
@@ -246,74 +664,10 @@ with tab1:
     else:  # Use Example Code
         example_choice = st.selectbox(
             "Select example:",
-            ["Security Issues", "Performance Problems", "Documentation Issues"],
+            list(EXAMPLES),
         )
 
-        if example_choice == "Security Issues":
-            code_content = """
-def get_user_data(user_id):
-    # SQL Injection vulnerability
-    query = "SELECT * FROM users WHERE id = " + str(user_id)
-    return db.execute(query)
-
-def login(username, password):
-    # Hardcoded credentials
-    if username == "admin" and password == "admin123":
-        return True
-    return False
-
-API_KEY = "sk-1234567890abcdef"  # Exposed secret
-"""
-        elif example_choice == "Performance Problems":
-            code_content = """
-def calculate_total(items):
-    # O(n*m) nested loop
-    total = 0
-    for item in items:
-        for price in item['prices']:
-            total = total + price
-    return total
-
-def process_data(data):
-    # Inefficient iteration
-    result = []
-    for i in range(len(data)):
-        if data[i] > 0:
-            result.append(data[i] * 2)
-    return result
-
-def find_duplicates(arr):
-    # O(n²) algorithm
-    duplicates = []
-    for i in range(len(arr)):
-        for j in range(i+1, len(arr)):
-            if arr[i] == arr[j]:
-                duplicates.append(arr[i])
-    return duplicates
-"""
-        else:  # Documentation Issues
-            code_content = """
-def calc(a, b, c):
-    x = a + b
-    y = x * c
-    z = y / 2
-    return z
-
-def process(data):
-    result = []
-    for item in data:
-        if item > 0:
-            result.append(item)
-    return result
-
-class DataProcessor:
-    def __init__(self, data):
-        self.data = data
-
-    def process(self):
-        return [x * 2 for x in self.data]
-"""
-        file_name = f"example_{example_choice.lower().replace(' ', '_')}.py"
+        code_content, file_name = EXAMPLES[example_choice]
 
     # Display code preview
     if code_content:
@@ -335,200 +689,125 @@ class DataProcessor:
     if not st.session_state.api_key:
         st.warning("⚠️ Please configure your Gemini API key in the sidebar")
 
+    if st.session_state.pop("review_cancelled", False):
+        st.warning("⏹️ Review cancelled")
+
     # Process review
     if review_button and code_content:
+        model_option = st.session_state.model_option
+        temperature = st.session_state.temperature
+
         with st.spinner("🔄 AI Agents are analyzing your code..."):
             try:
-                # Initialize LLM
-                llm = LLM(
-                    model=model_option,
-                    verbose=False,
-                    temperature=temperature,
-                    google_api_key=st.session_state.api_key,
-                )
-
-                # Create temporary file
-                with tempfile.NamedTemporaryFile(
-                    mode="w", suffix=".py", delete=False
-                ) as tmp_file:
-                    tmp_file.write(code_content)
-                    tmp_file_path = tmp_file.name
-
-                # Initialize tools
-                file_tool = FileReadTool()
+                # litellm falls back to GOOGLE_API_KEY for Gemini calls
+                os.environ["GOOGLE_API_KEY"] = st.session_state.api_key
 
                 # Progress tracking
                 progress_bar = st.progress(0)
                 status_text = st.empty()
 
-                # Create agents
-                status_text.text("🤖 Initializing AI agents...")
-                progress_bar.progress(10)
-
-                code_analyzer = Agent(
-                    role="Senior Code Quality Analyst",
-                    goal=(
-                        "Analyze code for bugs, code smells, and potential "
-                        f"issues in {tmp_file_path}"
-                    ),
-                    backstory=(
-                        "You are a veteran software engineer with 20 years "
-                        "of experience in code reviews. You have a keen eye "
-                        "for spotting bugs, performance issues, and "
-                        "violations of best practices."
-                    ),
-                    verbose=False,
-                    allow_delegation=False,
-                    tools=[file_tool],
-                    llm=llm,
-                )
-
-                security_auditor = Agent(
-                    role="Cybersecurity Expert",
-                    goal=(
-                        "Identify security vulnerabilities and risks in "
-                        f"{tmp_file_path}"
-                    ),
-                    backstory=(
-                        "You are a certified security researcher specializing "
-                        "in OWASP Top 10 vulnerabilities. You've prevented "
-                        "countless security breaches."
-                    ),
-                    verbose=False,
-                    allow_delegation=False,
-                    tools=[file_tool],
-                    llm=llm,
-                )
-
-                performance_expert = Agent(
-                    role="Performance Optimization Specialist",
-                    goal=(
-                        "Analyze code performance and suggest optimizations "
-                        f"for {tmp_file_path}"
-                    ),
-                    backstory=(
-                        "You are a performance engineer who has optimized "
-                        "applications serving millions of users."
-                    ),
-                    verbose=False,
-                    allow_delegation=False,
-                    tools=[file_tool],
-                    llm=llm,
+                # Identical code + settings reuse a finished review
+                cache_key = review_cache_key(
+                    code_content,
+                    model_option,
+                    temperature,
+                    st.session_state.api_key,
                 )
+                result = get_cached_review(cache_key)
 
-                documentation_writer = Agent(
-                    role="Technical Documentation Expert",
-                    goal=(
-                        "Review and improve code documentation for "
-                        f"{tmp_file_path}"
-                    ),
-                    backstory=(
-                        "You are a technical writer who believes great code "
-                        "tells a story."
-                    ),
-                    verbose=False,
-                    allow_delegation=False,
-                    tools=[file_tool],
-                    llm=llm,
-                )
+                if result is None:
+                    # Create agents
+                    status_text.text("🤖 Initializing AI agents...")
+                    progress_bar.progress(10)
 
-                review_synthesizer = Agent(
-                    role="Lead Code Reviewer",
-                    goal=(
-                        "Synthesize all reviews and create actionable "
-                        "recommendations"
-                    ),
-                    backstory=(
-                        "You are a tech lead who has mentored dozens of "
-                        "developers."
-                    ),
-                    verbose=False,
-                    allow_delegation=False,
-                    llm=llm,
-                )
+                    crewai = crewai_modules()
+                    agents = build_agents(
+                        model_option,
+                        temperature,
+                        st.session_state.api_key,
+                    )
 
-                progress_bar.progress(20)
+                    progress_bar.progress(20)
 
-                # Create tasks
-                status_text.text("📋 Creating analysis tasks...")
+                    # Create tasks
+                    status_text.text("📋 Creating analysis tasks...")
 
-                analyze_task = Task(
-                    description=f"""
-Analyze {tmp_file_path} for:
+                    analyze_task = crewai.Task(
+                        description=TASK_PREAMBLE
+                        + """
+Analyze the code for:
 1. Code quality issues (complexity, readability, maintainability)
 2. Potential bugs and logic errors
 3. Code smells (duplicated code, long functions, etc.)
 4. Adherence to coding standards and best practices
 5. Error handling and edge cases
 
-Always read the file contents with the FileReadTool before analyzing.
-Provide specific line numbers and examples for each issue found.
+Include an example for each issue found.
 """,
-                    expected_output=(
-                        "Detailed code quality analysis with specific "
-                        "issues and line numbers."
-                    ),
-                    agent=code_analyzer,
-                )
-
-                security_task = Task(
-                    description=f"""
-Perform security audit of {tmp_file_path}:
+                        expected_output=(
+                            "Detailed code quality analysis with specific "
+                            "issues and line numbers."
+                        ),
+                        agent=agents["analysis"],
+                    )
+
+                    security_task = crewai.Task(
+                        description=TASK_PREAMBLE
+                        + """
+Perform a security audit of the code:
 1. Check for OWASP Top 10 vulnerabilities
 2. Identify authentication/authorization issues
 3. Look for injection vulnerabilities (SQL, XSS, Command)
 4. Review input validation and sanitization
 5. Check for hardcoded secrets or sensitive data
-
-Rate each vulnerability by severity (Critical/High/Medium/Low) and
-reference relevant lines from the file.
-""",
-                    expected_output=(
-                        "Security audit report with vulnerability severity "
-                        "ratings."
-                    ),
-                    agent=security_auditor,
-                    context=[analyze_task],
-                )
-
-                performance_task = Task(
-                    description=f"""
-Analyze performance of {tmp_file_path}:
+"""
+                        + ANALYSIS_CONTEXT,
+                        expected_output=(
+                            "Security audit report with vulnerability severity "
+                            "ratings."
+                        ),
+                        agent=agents["security"],
+                    )
+
+                    performance_task = crewai.Task(
+                        description=TASK_PREAMBLE
+                        + """
+Analyze performance of the code:
 1. Identify algorithmic inefficiencies (O(n²), nested loops)
 2. Check database query optimization
 3. Look for memory leaks or excessive memory usage
 4. Review caching opportunities
 
-Suggest specific optimizations with expected impact and point to the
-relevant code lines.
-""",
-                    expected_output=(
-                        "Performance analysis with optimization "
-                        "recommendations."
-                    ),
-                    agent=performance_expert,
-                    context=[analyze_task],
-                )
-
-                documentation_task = Task(
-                    description=f"""
-Review documentation quality of {tmp_file_path}:
+Suggest specific optimizations with expected impact.
+"""
+                        + ANALYSIS_CONTEXT,
+                        expected_output=(
+                            "Performance analysis with optimization "
+                            "recommendations."
+                        ),
+                        agent=agents["performance"],
+                    )
+
+                    documentation_task = crewai.Task(
+                        description=TASK_PREAMBLE
+                        + """
+Review documentation quality of the code:
 1. Check for missing docstrings/comments
 2. Assess clarity of existing documentation
 3. Identify undocumented complex logic
 4. Review function/method parameter descriptions
 
 Provide examples of improved documentation for key functions.
-""",
-                    expected_output=(
-                        "Documentation review with improvement suggestions."
-                    ),
-                    agent=documentation_writer,
-                    context=[analyze_task],
-                )
-
-                synthesis_task = Task(
-                    description="""
+"""
+                        + ANALYSIS_CONTEXT,
+                        expected_output=(
+                            "Documentation review with improvement suggestions."
+                        ),
+                        agent=agents["documentation"],
+                    )
+
+                    synthesis_task = crewai.Task(
+                        description="""
 Create comprehensive code review report:
 1. Summarize all findings from other agents
 2. Prioritize issues by severity and impact
@@ -542,91 +821,123 @@ Format as a professional code review report with sections:
 - Major Issues
 - Minor Issues
 - Recommendations & Next Steps
-""",
-                    expected_output=(
-                        "Complete code review report with prioritized "
-                        "recommendations."
-                    ),
-                    agent=review_synthesizer,
-                    context=[
-                        analyze_task,
-                        security_task,
-                        performance_task,
-                        documentation_task,
-                    ],
-                )
-
-                progress_bar.progress(30)
-
-                # Create and run crew
-                status_text.text("🔍 Agent 1/5: Analyzing code quality...")
-                progress_bar.progress(40)
-
-                code_review_crew = Crew(
-                    agents=[
-                        code_analyzer,
-                        security_auditor,
-                        performance_expert,
-                        documentation_writer,
-                        review_synthesizer,
-                    ],
-                    tasks=[
-                        analyze_task,
-                        security_task,
-                        performance_task,
-                        documentation_task,
-                        synthesis_task,
-                    ],
-                    process=Process.sequential,
-                    verbose=False,
-                )
 
-                # Progress updates (UI only)
-                status_text.text("🔒 Agent 2/5: Auditing security...")
-                progress_bar.progress(55)
-                time.sleep(1)
+Code quality analysis:
+{analysis}
 
-                status_text.text("⚡ Agent 3/5: Analyzing performance...")
-                progress_bar.progress(70)
-                time.sleep(1)
+Security audit:
+{security}
 
-                status_text.text("📝 Agent 4/5: Reviewing documentation...")
-                progress_bar.progress(85)
-                time.sleep(1)
+Performance analysis:
+{performance}
 
-                status_text.text("📊 Agent 5/5: Synthesizing results...")
-                progress_bar.progress(95)
-
-                # Execute review
-                result = code_review_crew.kickoff(
-                    inputs={"code_file": tmp_file_path}
-                )
+Documentation review:
+{documentation}
+""",
+                        expected_output=(
+                            "Complete code review report with prioritized "
+                            "recommendations."
+                        ),
+                        agent=agents["synthesis"],
+                    )
+
+                    progress_bar.progress(30)
+
+                    # Create crews; fan-out after analysis, fan-in at synthesis
+                    analysis_crew = crewai.Crew(
+                        agents=[agents["analysis"]],
+                        tasks=[analyze_task],
+                        process=crewai.Process.sequential,
+                        verbose=False,
+                    )
+                    synthesis_crew = crewai.Crew(
+                        agents=[agents["synthesis"]],
+                        tasks=[synthesis_task],
+                        process=crewai.Process.sequential,
+                        verbose=False,
+                    )
+
+                    # One status box per agent, filled as its output lands
+                    stage_status = {}
+
+                    def on_start(stage, percent):
+                        progress_bar.progress(percent)
+                        stage_status[stage] = st.status(STAGE_LABELS[stage])
+
+                    def on_output(stage, text, percent):
+                        progress_bar.progress(percent)
+                        status = stage_status[stage]
+                        status.markdown(text)
+                        status.update(
+                            state="complete", expanded=stage == "synthesis"
+                        )
+
+                    # Execute review; clicking cancel reruns the script,
+                    # which interrupts the run at the next stage update.
+                    # LLM calls already in flight run to completion (and
+                    # are billed); only the stages after them are skipped.
+                    cancel_slot = st.empty()
+                    cancel_slot.button(
+                        "⏹️ Cancel Review",
+                        key="cancel_review",
+                        help=(
+                            "Stops the review between stages. Agents that "
+                            "are already running finish their current call "
+                            "first."
+                        ),
+                        on_click=lambda: st.session_state.update(
+                            review_cancelled=True
+                        ),
+                    )
+                    # Stage labels live in the status boxes from here on
+                    status_text.empty()
+                    result = asyncio.run(
+                        run_review(
+                            analysis_crew,
+                            {
+                                "security": security_task,
+                                "performance": performance_task,
+                                "documentation": documentation_task,
+                            },
+                            synthesis_crew,
+                            get_llm(
+                                model_option,
+                                temperature,
+                                st.session_state.api_key,
+                            ),
+                            code_content,
+                            on_start,
+                            on_output,
+                        )
+                    )
+                    cancel_slot.empty()
+                    put_cached_review(cache_key, result)
 
                 progress_bar.progress(100)
                 status_text.text("✅ Review complete!")
 
-                # Store result
-                st.session_state.review_result = {
-                    "content": str(result),
-                    "file_name": file_name,
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "code": code_content,
-                    "model": model_option,
-                    "temperature": temperature,
-                }
-
-                # Add to history
+                # Store result on disk, keep only metadata in the session
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 st.session_state.review_history.append(
-                    st.session_state.review_result
+                    {
+                        "id": save_review(result, code_content),
+                        "file_name": file_name,
+                        "timestamp": timestamp,
+                        "download_name": (
+                            f"review_{file_name}_"
+                            f"{timestamp.replace(':', '-')}.txt"
+                        ),
+                        "model": model_option,
+                        "temperature": temperature,
+                        "size": len(code_content),
+                    }
                 )
+                st.session_state.review_count += 1
 
-                # Cleanup
-                try:
-                    os.unlink(tmp_file_path)
-                except OSError:
-                    pass
+                # Evict the oldest reviews beyond the history cap
+                while len(st.session_state.review_history) > MAX_HISTORY:
+                    delete_review(st.session_state.review_history.pop(0)["id"])
 
-                time.sleep(1)
                 st.success("✅ Code review completed successfully!")
                 st.balloons()
 
@@ -643,12 +954,27 @@ Format as a professional code review report with sections:
                     "model exists, and you have internet connectivity."
                 )
 
-# Tab 2: Review Results
-with tab2:
+# Tab 2: Review Results; a fragment so browsing history reruns only this tab
+@st.fragment
+def render_review_results():
     st.header("📊 Review Results")
 
-    if st.session_state.review_result:
-        result = st.session_state.review_result
+    if st.session_state.review_history:
+        result = st.selectbox(
+            "Select review:",
+            st.session_state.review_history[::-1],
+            format_func=lambda r: f"{r['file_name']} ({r['timestamp']})",
+        )
+        try:
+            review = load_review(result["id"])
+        except (OSError, ValueError):
+            st.warning("⚠️ This review is no longer available on disk.")
+            review = {
+                "content": "",
+                "code": "",
+                "content_bytes": b"",
+                "code_bytes": b"",
+            }
 
         # Metadata
         col1, col2, col3, col4 = st.columns(4)
@@ -665,7 +991,7 @@ with tab2:
 
         # Results display
         st.subheader("🔍 Detailed Analysis")
-        st.markdown(result["content"])
+        st.markdown(review["content"])
 
         st.divider()
 
@@ -674,17 +1000,14 @@ with tab2:
         with col1:
             st.download_button(
                 label="📥 Download Report (TXT)",
-                data=result["content"],
-                file_name=(
-                    f"review_{result['file_name']}_"
-                    f"{result['timestamp'].replace(':', '-')}.txt"
-                ),
+                data=review["content_bytes"],
+                file_name=result["download_name"],
                 mime="text/plain",
             )
         with col2:
             st.download_button(
                 label="📥 Download Code (Source)",
-                data=result["code"],
+                data=review["code_bytes"],
                 file_name=result["file_name"],
                 mime="text/plain",
             )
@@ -725,12 +1048,15 @@ with tab2:
 
             **5. Comprehensive Summary**
             - Prioritized issues
-            - Fix effort estimates
             - Overall quality score
             - Actionable roadmap
             """
             )
 
+
+with tab2:
+    render_review_results()
+
 # Tab 3: Examples
 with tab3:
     st.header("📚 Example Reviews")
@@ -845,7 +1171,7 @@ with tab4:
     code quality, working together to provide detailed analysis.
 
     #### 🎯 Key Features:
-    - **Multi-Agent Architecture**: 5 specialized AI agents working in sequence
+    - **Multi-Agent Architecture**: 5 specialized AI agents, with the independent reviews running in parallel
     - **Comprehensive Analysis**: Quality, security, performance, and documentation
     - **Instant Feedback**: Results typically within seconds to a couple of minutes
     - **Multiple Input Methods**: Upload files, paste code, or use examples
@@ -871,9 +1197,10 @@ with tab4:
     5. View detailed results in seconds!
 
     #### 🛡️ Privacy & Security:
-    - Code is processed temporarily and not stored by this app
+    - Code and reports from your last 20 reviews are kept in a temporary
+      directory so they can be reopened
+    - Stored reviews are deleted after one hour, or sooner as newer ones arrive
     - API key stored only in session memory
-    - No data retention by default
 
     ---
 
@@ -897,7 +1224,7 @@ with tab4:
         # Avoid referencing agent variables that may not exist yet
         st.info("🤖 5 Agents Ready")
     with col3:
-        st.info(f"📊 {len(st.session_state.review_history)} Reviews Done")
+        st.info(f"📊 {st.session_state.review_count} Reviews Done")
 
 # Footer
 st.divider()
@@ -0,0 +1,157 @@
+"""
+Final report assembly for the AI Code Review System
+Merges the per-agent reviews into one report without an extra LLM call
+"""
+
+import re
+
+# Findings are headed "### [Severity] Title", optionally with the tag in bold
+# or italics; severities map to report sections
+FINDING_HEADING = re.compile(
+    r"^(#{2,4})\s*(?P<open>[*_]*)\[(?P<severity>critical|high|medium|low)\]"
+    r"(?P<close>[*_]*)\s*(?P<title>.+?)\s*$",
+    re.IGNORECASE,
+)
+HEADING = re.compile(r"^(#{1,6})\s")
+# The line agents are asked to answer with when a review finds nothing
+NO_ISSUES = re.compile(
+    r"^\s*[*_]*no issues found\.?[*_]*\s*$", re.IGNORECASE
+)
+SEVERITY_SECTIONS = {
+    "critical": "Critical Issues",
+    "high": "Major Issues",
+    "medium": "Minor Issues",
+    "low": "Minor Issues",
+}
+FINDING_SOURCES = {
+    "analysis": "Quality",
+    "security": "Security",
+    "performance": "Performance",
+    "documentation": "Documentation",
+}
+
+
+def scan_headings(review):
+    """Yield ``(line, level, tagged)`` for each line of a review.
+
+    ``level`` is the markdown heading level (0 for body text) and ``tagged``
+    the severity match for finding headings. Lines inside code fences are
+    always body text, so ``# comments`` in examples don't count as headings.
+    """
+    in_fence = False
+    for line in review.splitlines():
+        heading = tagged = None
+        if not in_fence:
+            tagged = FINDING_HEADING.match(line)
+            heading = tagged or HEADING.match(line)
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+        yield line, len(heading.group(1)) if heading else 0, tagged
+
+
+def finding_title(tagged):
+    """Return a finding heading's title without emphasis wrapping the tag.
+
+    In ``**[High] Title**`` the closing ``**`` ends the title; only markers
+    that open before the tag and aren't closed right after it are stripped,
+    so underscores in names like ``__init__`` survive.
+    """
+    title = tagged["title"]
+    unclosed = tagged["open"][len(tagged["close"]):]
+    if unclosed and title.endswith(unclosed[::-1]):
+        title = title[: -len(unclosed)].rstrip()
+    return title
+
+
+def split_findings(review):
+    """Yield ``(severity, title, body)`` for each tagged finding in a review.
+
+    A finding's body ends at the next finding or at any heading of the same
+    or a higher level, so trailing summaries don't leak into it.
+    """
+    current = None
+    for line, level, tagged in scan_headings(review):
+        if current and (tagged or 0 < level <= current[0]):
+            yield current[1], current[2], "\n".join(current[3]).strip()
+            current = None
+        if tagged:
+            severity = tagged["severity"].lower()
+            current = (level, severity, finding_title(tagged), [])
+        elif current:
+            current[3].append(line)
+    if current:
+        yield current[1], current[2], "\n".join(current[3]).strip()
+
+
+def synthesize_report(reviews):
+    """Merge the per-agent reviews into the final report without an LLM call.
+
+    A review without tagged findings only counts as "no issues" for its
+    source when it says so with the NO_ISSUES line. Returns None when any
+    other review has no tagged findings (e.g. it listed them as bullets), or
+    when no review has findings at all, so the caller can fall back to the
+    synthesis agent.
+    """
+    sections = {
+        title: [] for title in dict.fromkeys(SEVERITY_SECTIONS.values())
+    }
+    clean_sources = []
+    for stage, review in reviews.items():
+        findings = list(split_findings(review))
+        if not findings:
+            if not any(NO_ISSUES.match(line) for line in review.splitlines()):
+                return None
+            clean_sources.append(FINDING_SOURCES[stage])
+        for severity, title, body in findings:
+            sections[SEVERITY_SECTIONS[severity]].append(
+                (f"[{FINDING_SOURCES[stage]}] {title}", body)
+            )
+    if len(clean_sources) == len(reviews):
+        return None
+
+    counts = {title: len(items) for title, items in sections.items()}
+    total = sum(counts.values())
+    score = max(
+        1,
+        round(
+            10
+            - 2 * counts["Critical Issues"]
+            - counts["Major Issues"]
+            - 0.25 * counts["Minor Issues"]
+        ),
+    )
+
+    lines = [
+        "# Code Review Report",
+        "",
+        "## Summary",
+        "",
+        f"{total} {'issue' if total == 1 else 'issues'} found across code "
+        f"quality, security, performance and documentation: "
+        f"{counts['Critical Issues']} "
+        f"critical, {counts['Major Issues']} major and "
+        f"{counts['Minor Issues']} minor.",
+    ]
+    if clean_sources:
+        lines += ["", f"No issues reported for: {', '.join(clean_sources)}."]
+    lines += ["", f"**Overall code quality score: {score}/10**"]
+    for section, items in sections.items():
+        lines += ["", f"## {section}"]
+        if not items:
+            lines += ["", "None found."]
+        for heading, body in items:
+            lines += ["", f"### {heading}", "", body]
+
+    steps = []
+    if sections["Critical Issues"]:
+        steps.append(
+            "Fix the critical issues before shipping: "
+            + "; ".join(heading for heading, _ in sections["Critical Issues"])
+        )
+    if sections["Major Issues"]:
+        steps.append("Plan fixes for the major issues in the next iteration.")
+    if sections["Minor Issues"]:
+        steps.append("Address the minor issues as part of regular cleanup.")
+    lines += ["", "## Recommendations & Next Steps", ""]
+    lines += [f"{number}. {step}" for number, step in enumerate(steps, 1)]
+    return "\n".join(lines).rstrip() + "\n"
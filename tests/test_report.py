@@ -0,0 +1,98 @@
+from report import split_findings, synthesize_report
+
+SECURITY = """\
+## Security Audit
+
+### [High] SQL injection in get_user_data
+Line 4 concatenates user input into the query.
+
+```python
+# use a parameterized query instead
+query = "SELECT * FROM users WHERE id = ?"
+```
+
+### **[Critical]** Hardcoded API key
+Line 13 exposes a secret.
+
+## Summary
+Two issues found.
+"""
+
+CLEAN = "The documentation is clear and complete.\n\nNo issues found.\n"
+
+
+def reviews(**overrides):
+    base = {
+        "analysis": "### [Low] Short variable names\nLine 2 uses `x`.",
+        "security": SECURITY,
+        "performance": "### _[Medium]_ Quadratic duplicate search\nUse a set.",
+        "documentation": CLEAN,
+    }
+    return {**base, **overrides}
+
+
+def test_split_findings_stops_at_higher_headings_and_ignores_fences():
+    findings = list(split_findings(SECURITY))
+
+    assert [(severity, title) for severity, title, _ in findings] == [
+        ("high", "SQL injection in get_user_data"),
+        ("critical", "Hardcoded API key"),
+    ]
+    assert "# use a parameterized query" in findings[0][2]
+    assert findings[1][2] == "Line 13 exposes a secret."
+
+
+def test_split_findings_keeps_underscores_in_titles():
+    findings = list(
+        split_findings(
+            "### [Low] Rename __init__\nbody\n"
+            "### **[High] Unbounded _cache**\nbody"
+        )
+    )
+
+    assert [title for _, title, _ in findings] == [
+        "Rename __init__",
+        "Unbounded _cache",
+    ]
+
+
+def test_synthesize_report_pluralises_the_issue_count():
+    report = synthesize_report(
+        reviews(analysis=CLEAN, security=CLEAN, documentation=CLEAN)
+    )
+
+    assert "1 issue found" in report
+
+
+def test_synthesize_report_buckets_findings_by_severity():
+    report = synthesize_report(reviews())
+
+    critical = report.index("## Critical Issues")
+    major = report.index("## Major Issues")
+    minor = report.index("## Minor Issues")
+    assert critical < report.index("[Security] Hardcoded API key") < major
+    assert major < report.index("[Security] SQL injection") < minor
+    assert "[Performance] Quadratic duplicate search" in report[minor:]
+    assert "Two issues found." not in report
+    assert "1 critical, 1 major and 2 minor" in report
+    assert "No issues reported for: Documentation." in report
+
+
+def test_synthesize_report_falls_back_when_nothing_parses():
+    assert synthesize_report({stage: CLEAN for stage in reviews()}) is None
+    assert (
+        synthesize_report(reviews(documentation="## Findings\nMissing docs."))
+        is None
+    )
+
+
+def test_synthesize_report_falls_back_on_untagged_finding_lists():
+    listed = (
+        "1. **[Critical] SQL injection** on line 4\n"
+        "2. **[High] Hardcoded password** on line 9\n"
+    )
+    assert synthesize_report(reviews(security=listed)) is None
+    assert (
+        synthesize_report(reviews(documentation="- Missing docstrings"))
+        is None
+    )